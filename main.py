@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils.extract import extract_all_pages
 from utils.transform import transform_data
-from utils.load import load_to_csv
+from utils.load import load_to_csv, load_to_parquet, PYARROW_AVAILABLE
 
 # Configure logging
 logging.basicConfig(
@@ -25,17 +25,30 @@ logger = logging.getLogger(__name__)
 BASE_URL = "https://fashion-studio.dicoding.dev"
 MAX_PAGES = 50
 CSV_OUTPUT = "products.csv"
+# Parquet copy for downstream Python stages, written when pyarrow is
+# installed; set to None to write CSV only
+PARQUET_OUTPUT = "products.parquet"
 
 
-def run_etl_pipeline():
+def run_etl_pipeline(parquet_output: str = None):
     """
     Run the complete ETL pipeline.
     
     Steps:
     1. Extract: Scrape data from Fashion Studio website
     2. Transform: Clean and transform the data
-    3. Load: Save to CSV
+    3. Load: Save to CSV, plus a Parquet copy when pyarrow is installed
+    
+    Args:
+        parquet_output: Path of the Parquet copy; defaults to PARQUET_OUTPUT,
+            read at call time like the other settings. Pass "" to skip it
+        
+    Returns:
+        bool: True if the pipeline succeeded, False otherwise
     """
+    if parquet_output is None:
+        parquet_output = PARQUET_OUTPUT
+    
     logger.info("=" * 50)
     logger.info("Starting Fashion Studio ETL Pipeline")
     logger.info("=" * 50)
@@ -44,9 +57,9 @@ def run_etl_pipeline():
     logger.info("\n[STEP 1] EXTRACT - Scraping data from website...")
     try:
         raw_data = extract_all_pages(BASE_URL, MAX_PAGES)
-        logger.info(f"Extraction complete: {len(raw_data)} products extracted")
+        logger.info("Extraction complete: %d products extracted", len(raw_data))
     except Exception as e:
-        logger.error(f"Extraction failed: {e}")
+        logger.error("Extraction failed: %s", e)
         return False
     
     if not raw_data:
@@ -57,9 +70,9 @@ def run_etl_pipeline():
     logger.info("\n[STEP 2] TRANSFORM - Cleaning and transforming data...")
     try:
         df = transform_data(raw_data)
-        logger.info(f"Transformation complete: {len(df)} products after cleaning")
+        logger.info("Transformation complete: %d products after cleaning", len(df))
     except Exception as e:
-        logger.error(f"Transformation failed: {e}")
+        logger.error("Transformation failed: %s", e)
         return False
     
     if df.empty:
@@ -70,16 +83,26 @@ def run_etl_pipeline():
     logger.info("\n[STEP 3] LOAD - Saving data to CSV...")
     csv_success = load_to_csv(df, CSV_OUTPUT)
     if csv_success:
-        logger.info(f"✓ CSV: Data saved to {CSV_OUTPUT}")
+        logger.info("✓ CSV: Data saved to %s", CSV_OUTPUT)
     else:
         logger.error("✗ CSV: Failed to save")
         return False
     
+    # Parquet keeps dtypes and is much cheaper to read back than CSV;
+    # CSV stays the main output, so a failed Parquet write is not fatal
+    if parquet_output and not PYARROW_AVAILABLE:
+        logger.info("Parquet: pyarrow not installed, skipping %s", parquet_output)
+    elif parquet_output:
+        if load_to_parquet(df, parquet_output):
+            logger.info("✓ Parquet: Data saved to %s", parquet_output)
+        else:
+            logger.warning("✗ Parquet: Failed to save")
+    
     # Summary
     logger.info("\n" + "=" * 50)
     logger.info("ETL Pipeline completed!")
-    logger.info(f"Total products processed: {len(df)}")
-    logger.info(f"Output file: {CSV_OUTPUT}")
+    logger.info("Total products processed: %d", len(df))
+    logger.info("Output file: %s", CSV_OUTPUT)
     logger.info("=" * 50)
     
     return True
@@ -3,17 +3,22 @@ Unit tests for Extract module
 """
 
 import pytest
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.extract import (
+    Product,
     extract_product_from_card,
     extract_products_from_page,
     fetch_page,
-    extract_all_pages
+    enable_cache,
+    extract_all_pages,
+    _extract_products_from_tree,
+    _fetch
 )
 
 
@@ -22,7 +27,7 @@ class TestExtractProductFromCard:
     
     def test_extract_valid_product(self):
         """Test extraction from a valid product card"""
-        from bs4 import BeautifulSoup
+        from lxml import html as lxml_html
         
         # Mock HTML matching actual Fashion Studio structure
         html = '''
@@ -35,35 +40,55 @@ class TestExtractProductFromCard:
             <p>Gender: Men</p>
         </div>
         '''
-        soup = BeautifulSoup(html, 'html.parser')
-        card = soup.find('div', class_='collection-card')
+        card = lxml_html.fromstring(html)
         
         result = extract_product_from_card(card)
         
-        assert result is not None
-        assert result['title'] == 'T-shirt 1'
-        assert result['price'] == '$50.00'
-        assert '4.5' in result['rating']
-        assert '3' in result['colors']
-        assert 'M' in result['size']
-        assert 'Men' in result['gender']
+        assert isinstance(result, Product)
+        assert result.title == 'T-shirt 1'
+        assert result.price == '$50.00'
+        assert '4.5' in result.rating
+        assert '3' in result.colors
+        assert 'M' in result.size
+        assert 'Men' in result.gender
+    
+    def test_extract_unexpected_layout(self):
+        """Test extraction falls back to keywords when <p> tags are out of order"""
+        from lxml import html as lxml_html
+        
+        html = '''
+        <div class="collection-card">
+            <h3 class="product-title">Pants 3</h3>
+            <span class="price">$20.00</span>
+            <p>Gender: Women</p>
+            <p>Size: L</p>
+            <p>Rating: ⭐ 3.9 / 5</p>
+        </div>
+        '''
+        card = lxml_html.fromstring(html)
+        
+        result = extract_product_from_card(card)
+        
+        assert result.rating == 'Rating: ⭐ 3.9 / 5'
+        assert result.colors == ''
+        assert result.size == 'Size: L'
+        assert result.gender == 'Gender: Women'
     
     def test_extract_missing_elements(self):
         """Test extraction when some elements are missing"""
-        from bs4 import BeautifulSoup
+        from lxml import html as lxml_html
         
         html = '''
         <div class="collection-card">
             <h3 class="product-title">Hoodie 2</h3>
         </div>
         '''
-        soup = BeautifulSoup(html, 'html.parser')
-        card = soup.find('div', class_='collection-card')
+        card = lxml_html.fromstring(html)
         
         result = extract_product_from_card(card)
         
         assert result is not None
-        assert result['title'] == 'Hoodie 2'
+        assert result.title == 'Hoodie 2'
 
 
 class TestExtractProductsFromPage:
@@ -97,8 +122,76 @@ class TestExtractProductsFromPage:
         products = extract_products_from_page(html)
         
         assert len(products) == 2
-        assert products[0]['title'] == 'Product 1'
-        assert products[1]['title'] == 'Product 2'
+        assert products[0].title == 'Product 1'
+        assert products[1].title == 'Product 2'
+    
+    def test_extract_card_with_extra_classes(self):
+        """Test that cards are matched by class token, not exact class string"""
+        html = '''
+        <html>
+        <body>
+            <div class="collection-card featured">
+                <h3 class="product-title large">Product 1</h3>
+                <span class="price sale">$10.00</span>
+            </div>
+            <div class="collection-card-wrapper">
+                <h3 class="product-title">Not A Card</h3>
+            </div>
+        </body>
+        </html>
+        '''
+        
+        products = extract_products_from_page(html)
+        
+        assert len(products) == 1
+        assert products[0].title == 'Product 1'
+        assert products[0].price == '$10.00'
+    
+    def test_extract_from_bytes(self):
+        """Test extraction from raw UTF-8 bytes"""
+        html = '''
+        <html>
+        <head><meta charset="utf-8"></head>
+        <body>
+            <div class="collection-card">
+                <h3 class="product-title">Product 1</h3>
+                <span class="price">$10.00</span>
+                <p>Rating: ⭐ 4.0 / 5</p>
+                <p>3 Colors</p>
+                <p>Size: M</p>
+                <p>Gender: Men</p>
+            </div>
+        </body>
+        </html>
+        '''.encode('utf-8')
+        
+        products = extract_products_from_page(html)
+        
+        assert len(products) == 1
+        assert products[0].rating == 'Rating: ⭐ 4.0 / 5'
+    
+    def test_extract_from_latin1_bytes(self):
+        """Test that a non-UTF-8 page is decoded using its meta charset"""
+        html = '''
+        <html>
+        <head><meta charset="iso-8859-1"></head>
+        <body>
+            <div class="collection-card">
+                <h3 class="product-title">Café Shirt</h3>
+                <span class="price">$10.00</span>
+                <p>Rating: 4.0 / 5</p>
+                <p>3 Colors</p>
+                <p>Size: M</p>
+                <p>Gender: Men</p>
+            </div>
+        </body>
+        </html>
+        '''.encode('latin-1')
+        
+        products = extract_products_from_page(html)
+        
+        assert len(products) == 1
+        assert products[0].title == 'Café Shirt'
     
     def test_extract_empty_page(self):
         """Test extraction from empty page"""
@@ -113,27 +206,27 @@ class TestExtractProductsFromPage:
 class TestFetchPage:
     """Tests for fetch_page function"""
     
-    @patch('utils.extract.requests.get')
+    @patch('utils.extract._SESSION.get')
     def test_fetch_success(self, mock_get):
         """Test successful page fetch"""
         mock_response = MagicMock()
-        mock_response.text = '<html>Test</html>'
+        mock_response.content = b'<html>Test</html>'
         mock_response.raise_for_status = MagicMock()
         mock_get.return_value = mock_response
         
         result = fetch_page('http://example.com')
         
-        assert result == '<html>Test</html>'
+        assert result == b'<html>Test</html>'
         mock_get.assert_called_once()
     
-    @patch('utils.extract.requests.get')
+    @patch('utils.extract._SESSION.get')
     def test_fetch_with_retry(self, mock_get):
         """Test fetch with retry on failure"""
         import requests
         
         # First call fails, second succeeds
         mock_response = MagicMock()
-        mock_response.text = '<html>Success</html>'
+        mock_response.content = b'<html>Success</html>'
         mock_response.raise_for_status = MagicMock()
         
         mock_get.side_effect = [
@@ -143,10 +236,10 @@ class TestFetchPage:
         
         result = fetch_page('http://example.com', retries=3)
         
-        assert result == '<html>Success</html>'
+        assert result == b'<html>Success</html>'
         assert mock_get.call_count == 2
     
-    @patch('utils.extract.requests.get')
+    @patch('utils.extract._SESSION.get')
     def test_fetch_all_retries_fail(self, mock_get):
         """Test fetch when all retries fail"""
         import requests
@@ -159,41 +252,325 @@ class TestFetchPage:
         assert 'Failed to fetch' in str(excinfo.value)
 
 
+class TestEnableCache:
+    """Tests for enable_cache function"""
+    
+    def test_enable_cache_swaps_session(self, tmp_path):
+        """Test that fetch_page switches to a cached session"""
+        requests_cache = pytest.importorskip('requests_cache')
+        import utils.extract as extract
+        
+        # enable_cache closes the session it replaces, so hand it a throwaway
+        with patch.object(extract, '_SESSION', extract._new_session()), \
+                patch.object(extract, '_CACHE_ENABLED', False):
+            enable_cache(str(tmp_path / 'cache'), expire_after=60)
+            cached_session = extract._SESSION
+            
+            try:
+                assert isinstance(cached_session, requests_cache.CachedSession)
+                assert cached_session.settings.expire_after == 60
+                assert extract._CACHE_ENABLED is True
+            finally:
+                cached_session.close()
+
+
+class TestFetchAsync:
+    """Tests for the async _fetch helper"""
+    
+    @staticmethod
+    def _mock_session(*responses):
+        """Build a session whose get() context manager yields the given responses in turn"""
+        session = MagicMock()
+        contexts = []
+        for response in responses:
+            context = MagicMock()
+            if isinstance(response, Exception):
+                context.__aenter__ = AsyncMock(side_effect=response)
+            else:
+                context.__aenter__ = AsyncMock(return_value=response)
+            context.__aexit__ = AsyncMock(return_value=False)
+            contexts.append(context)
+        session.get.side_effect = contexts
+        return session
+    
+    @staticmethod
+    def _mock_response(text, chunk_size=8, encoding='utf-8', charset='utf-8'):
+        """Build a response that streams the encoded text in small chunks"""
+        body = text.encode(encoding)
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        
+        async def iter_chunked(size):
+            for chunk in chunks:
+                yield chunk
+        
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        response.charset = charset
+        response.content.iter_chunked = iter_chunked
+        return response
+    
+    def test_fetch_success(self):
+        """Test successful async page fetch"""
+        session = self._mock_session(self._mock_response('<html>Test</html>'))
+        
+        result = asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com'))
+        
+        assert result.tag == 'html'
+        assert result.xpath('string()') == 'Test'
+        session.get.assert_called_once()
+    
+    def test_fetch_parses_streamed_cards(self):
+        """Test that a page split across chunks parses into products"""
+        page = """
+        <html><body>
+            <div class="collection-card">
+                <h3 class="product-title">T-shirt 1</h3>
+                <span class="price">$50.00</span>
+                <p>Rating: ⭐ 4.5 / 5</p>
+            </div>
+        </body></html>
+        """
+        session = self._mock_session(self._mock_response(page, chunk_size=5))
+        
+        tree = asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com'))
+        products = _extract_products_from_tree(tree)
+        
+        assert len(products) == 1
+        assert products[0].title == 'T-shirt 1'
+        assert products[0].rating == 'Rating: ⭐ 4.5 / 5'
+    
+    def test_fetch_uses_meta_charset_without_http_charset(self):
+        """Test that a latin-1 page without an HTTP charset is decoded via its meta tag"""
+        page = """
+        <html><head><meta charset="iso-8859-1"></head><body>
+            <h3 class="product-title">Café Shirt</h3>
+        </body></html>
+        """
+        session = self._mock_session(
+            self._mock_response(page, encoding='latin-1', charset=None)
+        )
+        
+        result = asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com'))
+        
+        assert result.xpath('string(//h3)') == 'Café Shirt'
+    
+    def test_fetch_empty_body(self):
+        """Test that an empty body yields no tree and no products"""
+        session = self._mock_session(self._mock_response(''))
+        
+        tree = asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com'))
+        
+        assert tree is None
+        assert _extract_products_from_tree(tree) == []
+    
+    @patch('utils.extract.asyncio.sleep', new_callable=AsyncMock)
+    def test_fetch_with_retry(self, mock_sleep):
+        """Test async fetch with retry on timeout"""
+        session = self._mock_session(
+            asyncio.TimeoutError(),
+            self._mock_response('<html>Success</html>')
+        )
+        
+        result = asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com', retries=3))
+        
+        assert result.xpath('string()') == 'Success'
+        assert session.get.call_count == 2
+        mock_sleep.assert_awaited_once_with(1)
+    
+    def test_fetch_releases_slot_during_backoff(self):
+        """Test that the concurrency slot is free while waiting to retry"""
+        sem = asyncio.Semaphore(1)
+        session = self._mock_session(
+            asyncio.TimeoutError(),
+            self._mock_response('<html>Success</html>')
+        )
+        slot_free = []
+        
+        async def fake_sleep(seconds):
+            slot_free.append(not sem.locked())
+        
+        with patch('utils.extract.asyncio.sleep', new=fake_sleep):
+            asyncio.run(_fetch(session, sem, 'http://example.com', retries=2))
+        
+        assert slot_free == [True]
+    
+    @patch('utils.extract.asyncio.sleep', new_callable=AsyncMock)
+    def test_fetch_all_retries_fail(self, mock_sleep):
+        """Test async fetch when all retries fail"""
+        session = self._mock_session(asyncio.TimeoutError(), asyncio.TimeoutError())
+        
+        with pytest.raises(Exception) as excinfo:
+            asyncio.run(_fetch(session, asyncio.Semaphore(1), 'http://example.com', retries=2))
+        
+        assert 'Failed to fetch' in str(excinfo.value)
+
+
 class TestExtractAllPages:
     """Tests for extract_all_pages function"""
     
-    @patch('utils.extract.fetch_page')
-    @patch('utils.extract.extract_products_from_page')
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
+    @patch('utils.extract._extract_products_from_tree')
     def test_extract_single_page(self, mock_extract, mock_fetch):
         """Test extraction from a single page"""
         mock_fetch.return_value = '<html>Test</html>'
         mock_extract.return_value = [{'title': 'Product 1'}]
         
-        # Use low timeout to speed up test
-        with patch('utils.extract.time.sleep'):
-            products = extract_all_pages(max_pages=1)
+        products = extract_all_pages(max_pages=1)
         
         assert len(products) == 1
         assert products[0]['title'] == 'Product 1'
     
-    @patch('utils.extract.fetch_page')
-    @patch('utils.extract.extract_products_from_page')
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
+    @patch('utils.extract._extract_products_from_tree')
     def test_extract_multiple_pages(self, mock_extract, mock_fetch):
         """Test extraction from multiple pages"""
         mock_fetch.return_value = '<html>Test</html>'
         mock_extract.return_value = [{'title': 'Product'}]
         
-        with patch('utils.extract.time.sleep'):
-            products = extract_all_pages(max_pages=3)
+        products = extract_all_pages(max_pages=3)
         
         assert len(products) == 3
     
-    @patch('utils.extract.fetch_page')
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
+    @patch('utils.extract._extract_products_from_tree')
+    def test_extract_keeps_page_order(self, mock_extract, mock_fetch):
+        """Test that products come back in page order despite concurrent fetches"""
+        mock_fetch.side_effect = lambda session, sem, url: url
+        mock_extract.side_effect = lambda tree: [{'title': tree}]
+        
+        products = extract_all_pages(base_url='http://example.com', max_pages=3)
+        
+        assert [p['title'] for p in products] == [
+            'http://example.com',
+            'http://example.com/page2',
+            'http://example.com/page3',
+        ]
+    
+    @patch('utils.extract.asyncio.sleep', new_callable=AsyncMock)
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
+    @patch('utils.extract._extract_products_from_tree')
+    def test_extract_no_delay_by_default(self, mock_extract, mock_fetch, mock_sleep):
+        """Test that pages are not throttled unless a delay is given"""
+        mock_fetch.return_value = '<html>Test</html>'
+        mock_extract.return_value = []
+        
+        extract_all_pages(max_pages=3)
+        
+        mock_sleep.assert_not_awaited()
+    
+    @patch('utils.extract.asyncio.sleep', new_callable=AsyncMock)
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
+    @patch('utils.extract._extract_products_from_tree')
+    def test_extract_with_delay(self, mock_extract, mock_fetch, mock_sleep):
+        """Test that a delay staggers request starts per page"""
+        mock_fetch.return_value = '<html>Test</html>'
+        mock_extract.return_value = []
+        
+        extract_all_pages(max_pages=3, delay=0.5)
+        
+        waits = sorted(call.args[0] for call in mock_sleep.await_args_list)
+        assert waits == [0.0, 0.5, 1.0]
+    
+    @patch('utils.extract._fetch', new_callable=AsyncMock)
     def test_extract_handles_page_error(self, mock_fetch):
         """Test that extraction continues when a page fails"""
         mock_fetch.side_effect = Exception("Network error")
         
-        with patch('utils.extract.time.sleep'):
-            products = extract_all_pages(max_pages=2)
+        products = extract_all_pages(max_pages=2)
         
         assert products == []  # Should return empty list, not crash
+
+
+class TestExtractAllPagesThreaded:
+    """Tests for the thread pool fallback of extract_all_pages"""
+    
+    @patch('utils.extract.aiohttp', None)
+    @patch('utils.extract.fetch_page')
+    @patch('utils.extract.extract_products_from_page')
+    def test_extract_multiple_pages(self, mock_extract, mock_fetch):
+        """Test threaded extraction keeps page order"""
+        mock_fetch.side_effect = lambda url: url.encode()
+        mock_extract.side_effect = lambda html_content: [{'title': html_content.decode()}]
+        
+        products = extract_all_pages(base_url='http://example.com', max_pages=3)
+        
+        assert [p['title'] for p in products] == [
+            'http://example.com',
+            'http://example.com/page2',
+            'http://example.com/page3',
+        ]
+    
+    @patch('utils.extract._CACHE_ENABLED', True)
+    @patch('utils.extract.fetch_page')
+    @patch('utils.extract.extract_products_from_page')
+    def test_cache_uses_fetch_page(self, mock_extract, mock_fetch):
+        """Test that an enabled HTTP cache routes scraping through fetch_page"""
+        mock_fetch.return_value = b'<html>Test</html>'
+        mock_extract.return_value = [{'title': 'Product'}]
+        
+        products = extract_all_pages(max_pages=2)
+        
+        assert len(products) == 2
+        assert mock_fetch.call_count == 2
+    
+    @patch('utils.extract.aiohttp', None)
+    @patch('utils.extract.time')
+    @patch('utils.extract.fetch_page')
+    @patch('utils.extract.extract_products_from_page')
+    def test_extract_with_delay(self, mock_extract, mock_fetch, mock_time):
+        """Test that a delay spaces request starts from one shared start time"""
+        # A fake clock: sleeping and each fetch (0.03s) advance it
+        clock = [100.0]
+        starts = []
+        
+        def fake_sleep(seconds):
+            clock[0] += seconds
+        
+        def fake_fetch(url):
+            starts.append(clock[0] - 100.0)
+            clock[0] += 0.03
+            return b'<html>Test</html>'
+        
+        mock_time.monotonic.side_effect = lambda: clock[0]
+        mock_time.sleep.side_effect = fake_sleep
+        mock_fetch.side_effect = fake_fetch
+        mock_extract.return_value = []
+        
+        extract_all_pages(base_url='http://example.com', max_pages=4,
+                          concurrency=1, delay=0.05)
+        
+        # Each page only waits out what is left of its slot after the
+        # previous fetch, instead of a full (page_num - 1) * delay
+        waits = [call.args[0] for call in mock_time.sleep.call_args_list]
+        assert waits == pytest.approx([0.02, 0.02, 0.02])
+        assert starts == pytest.approx([0.0, 0.05, 0.10, 0.15])
+    
+    @patch('utils.extract.fetch_page')
+    @patch('utils.extract.extract_products_from_page')
+    def test_running_event_loop_uses_threads(self, mock_extract, mock_fetch):
+        """Test that calling from inside an event loop falls back to threads"""
+        mock_fetch.return_value = b'<html>Test</html>'
+        mock_extract.return_value = [{'title': 'Product'}]
+        
+        async def caller():
+            return extract_all_pages(max_pages=2)
+        
+        products = asyncio.run(caller())
+        
+        assert len(products) == 2
+        assert mock_fetch.call_count == 2
+    
+    def test_invalid_concurrency(self):
+        """Test that a concurrency below 1 is rejected instead of hanging"""
+        with pytest.raises(ValueError):
+            extract_all_pages(max_pages=2, concurrency=0)
+    
+    @patch('utils.extract.aiohttp', None)
+    @patch('utils.extract.fetch_page')
+    def test_extract_handles_page_error(self, mock_fetch):
+        """Test that threaded extraction continues when a page fails"""
+        mock_fetch.side_effect = Exception("Network error")
+        
+        products = extract_all_pages(max_pages=2)
+        
+        assert products == []
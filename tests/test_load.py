@@ -3,6 +3,7 @@ Unit tests for Load module
 """
 
 import pytest
+from unittest.mock import patch
 import pandas as pd
 import os
 import tempfile
@@ -10,7 +11,7 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.load import load_to_csv
+from utils.load import load_to_csv, load_to_parquet, load_to_feather
 
 
 @pytest.fixture
@@ -114,3 +115,178 @@ class TestLoadToCsv:
         finally:
             if os.path.exists(filepath):
                 os.unlink(filepath)
+    
+    def test_csv_pandas_fallback(self, sample_df):
+        """Test that CSV is written with pandas when pyarrow is unavailable"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            filepath = f.name
+        
+        try:
+            with patch('utils.load.pa', None):
+                result = load_to_csv(sample_df, filepath)
+            loaded_df = pd.read_csv(filepath)
+            
+            assert result is True
+            assert loaded_df['title'].tolist() == sample_df['title'].tolist()
+            assert loaded_df['price'].tolist() == sample_df['price'].tolist()
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+    
+    def test_csv_timestamp_format(self, sample_df):
+        """Test that datetime timestamps are written as 'YYYY-MM-DD HH:MM:SS'"""
+        sample_df['timestamp'] = pd.Timestamp('2024-01-01 12:00:00').as_unit('s')
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            filepath = f.name
+        
+        try:
+            load_to_csv(sample_df, filepath)
+            loaded_df = pd.read_csv(filepath)
+            
+            assert loaded_df['timestamp'].tolist() == ['2024-01-01 12:00:00'] * 2
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+    
+    def test_csv_timestamp_format_pandas_fallback(self, sample_df):
+        """Test the timestamp format when CSV is written with pandas"""
+        sample_df['timestamp'] = pd.Timestamp('2024-01-01 12:00:00').as_unit('s')
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            filepath = f.name
+        
+        try:
+            with patch('utils.load.pa', None):
+                load_to_csv(sample_df, filepath)
+            loaded_df = pd.read_csv(filepath)
+            
+            assert loaded_df['timestamp'].tolist() == ['2024-01-01 12:00:00'] * 2
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+
+    
+    def _write_both(self, df):
+        """Write df with the pyarrow writer and the pandas fallback, return both files' bytes"""
+        paths = []
+        for _ in range(2):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+                paths.append(f.name)
+        
+        try:
+            assert load_to_csv(df, paths[0]) is True
+            with patch('utils.load.pa', None):
+                assert load_to_csv(df, paths[1]) is True
+            contents = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    contents.append(f.read())
+            return contents
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.unlink(path)
+    
+    def test_csv_same_bytes_with_and_without_pyarrow(self, sample_df):
+        """Test that the pyarrow writer produces exactly the pandas output"""
+        pytest.importorskip("pyarrow")
+        sample_df['rating'] = [4.0, 4.2]
+        sample_df['size'] = sample_df['size'].astype('category')
+        sample_df['timestamp'] = pd.Timestamp('2024-01-01 12:00:00').as_unit('s')
+        
+        arrow_bytes, pandas_bytes = self._write_both(sample_df)
+        
+        assert arrow_bytes == pandas_bytes
+        assert arrow_bytes.splitlines()[:2] == [
+            b'title,price,rating,colors,size,gender,timestamp',
+            b'T-shirt 1,800000.0,4.0,3,M,Men,2024-01-01 12:00:00',
+        ]
+    
+    def test_csv_same_bytes_when_quoting_needed(self, sample_df):
+        """Test that values needing quotes are written the same way by both paths"""
+        pytest.importorskip("pyarrow")
+        sample_df['title'] = ['T-shirt, Slim', 'Hoodie "2"']
+        
+        arrow_bytes, pandas_bytes = self._write_both(sample_df)
+        
+        assert arrow_bytes == pandas_bytes
+        assert arrow_bytes.splitlines()[1].startswith(b'"T-shirt, Slim",800000.0,')
+    
+    def test_csv_mixed_type_column(self):
+        """Test that a column Arrow cannot convert is still written by pandas"""
+        pytest.importorskip("pyarrow")
+        df = pd.DataFrame({'a': [1, 'x'], 'b': [1, 2]})
+        
+        arrow_bytes, pandas_bytes = self._write_both(df)
+        
+        assert arrow_bytes == pandas_bytes == b'a,b\n1,1\nx,2\n'
+    
+    def test_csv_same_bytes_for_other_dtypes(self):
+        """Test that types pyarrow formats differently are written like pandas"""
+        pytest.importorskip("pyarrow")
+        timestamps = pd.to_datetime(['2024-01-01 12:00:00.5', '1960-06-01 00:00:00.5'])
+        frames = [
+            pd.DataFrame({'a': pd.to_timedelta([1, 2], unit='s'), 'b': [1, 2]}),
+            pd.DataFrame({'a': timestamps.tz_localize('UTC'), 'b': [1, 2]}),
+            pd.DataFrame({'a': timestamps, 'b': [1, 2]}),
+            pd.DataFrame({'a': [1e15, 12345678901.5], 'b': [1, 2]}),
+            pd.DataFrame({'a': [1e-5, 0.5], 'b': [1, 2]}),
+            pd.DataFrame({'a': pd.array([947080960.0, 1.5], dtype='float32'), 'b': [1, 2]}),
+            pd.DataFrame({'a': [True, False], 'b': [1, 2]}),
+            pd.DataFrame({'a': ['x', None]}),
+        ]
+        
+        for df in frames:
+            arrow_bytes, pandas_bytes = self._write_both(df)
+            assert arrow_bytes == pandas_bytes, df.dtypes
+
+
+class TestLoadToParquet:
+    """Tests for load_to_parquet function"""
+    
+    def test_save_to_parquet_success(self, sample_df):
+        """Test successful Parquet save and round trip"""
+        pytest.importorskip('pyarrow')
+        with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as f:
+            filepath = f.name
+        
+        try:
+            result = load_to_parquet(sample_df, filepath)
+            loaded_df = pd.read_parquet(filepath)
+            
+            assert result is True
+            assert loaded_df['title'].tolist() == sample_df['title'].tolist()
+            assert loaded_df['price'].tolist() == sample_df['price'].tolist()
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+    
+    def test_save_empty_df_to_parquet(self, empty_df):
+        """Test saving empty DataFrame to Parquet"""
+        assert load_to_parquet(empty_df, 'unused.parquet') is False
+        assert not os.path.exists('unused.parquet')
+
+
+class TestLoadToFeather:
+    """Tests for load_to_feather function"""
+    
+    def test_save_to_feather_success(self, sample_df):
+        """Test successful Feather save and round trip"""
+        pytest.importorskip('pyarrow')
+        with tempfile.NamedTemporaryFile(suffix='.feather', delete=False) as f:
+            filepath = f.name
+        
+        try:
+            result = load_to_feather(sample_df, filepath)
+            loaded_df = pd.read_feather(filepath)
+            
+            assert result is True
+            assert loaded_df['title'].tolist() == sample_df['title'].tolist()
+            assert loaded_df['rating'].tolist() == sample_df['rating'].tolist()
+        finally:
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+    
+    def test_save_empty_df_to_feather(self, empty_df):
+        """Test saving empty DataFrame to Feather"""
+        assert load_to_feather(empty_df, 'unused.feather') is False
+        assert not os.path.exists('unused.feather')
@@ -7,6 +7,8 @@ import pandas as pd
 from datetime import datetime
 import sys
 import os
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -18,6 +20,8 @@ from utils.transform import (
     clean_gender,
     transform_data
 )
+from utils import transform
+from utils.extract import Product
 
 
 class TestCleanPrice:
@@ -91,6 +95,11 @@ class TestCleanColors:
         assert clean_colors("5 Colors") == 5
         assert clean_colors("10 colors") == 10
     
+    def test_colors_too_large(self):
+        """Test that a color count beyond int16 is treated as invalid"""
+        assert clean_colors("32767 Colors") == 32767
+        assert clean_colors("40000 Colors") is None
+    
     def test_empty_colors(self):
         """Test handling empty colors"""
         result = clean_colors("")
@@ -122,6 +131,12 @@ class TestCleanSize:
         result = clean_size("M")
         assert result == "M"
     
+    def test_size_prefix_case_insensitive(self):
+        """Test that the size prefix is stripped regardless of case"""
+        assert clean_size("SIZE: XL") == "XL"
+        assert clean_size("size:M") == "M"
+        assert clean_size("Size:  ") is None
+    
     def test_empty_size(self):
         """Test handling empty size"""
         result = clean_size("")
@@ -151,6 +166,12 @@ class TestCleanGender:
         result = clean_gender("Women")
         assert result == "Women"
     
+    def test_gender_prefix_case_insensitive(self):
+        """Test that the gender prefix is stripped regardless of case"""
+        assert clean_gender("GENDER: Men") == "Men"
+        assert clean_gender("gender:Women") == "Women"
+        assert clean_gender("Gender:") is None
+    
     def test_empty_gender(self):
         """Test handling empty gender"""
         result = clean_gender("")
@@ -189,6 +210,44 @@ class TestTransformData:
         assert df.iloc[0]['gender'] == 'Men'
         assert 'timestamp' in df.columns
     
+    def test_transform_product_records(self):
+        """Test transforming Product records as returned by the extractor"""
+        raw_data = [
+            Product("T-shirt 1", "$50.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men")
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert len(df) == 1
+        assert df.iloc[0]['title'] == 'T-shirt 1'
+        assert df.iloc[0]['price'] == 800000.0
+        assert df.iloc[0]['gender'] == 'Men'
+    
+    def test_size_gender_categorical(self):
+        """Test that low-cardinality size and gender are stored as categories"""
+        raw_data = [
+            Product("T-shirt 1", "$50.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men"),
+            Product("T-shirt 2", "$60.00", "⭐ 4.0 / 5", "2 Colors", "Size: L", "Gender: Men")
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert isinstance(df['size'].dtype, pd.CategoricalDtype)
+        assert isinstance(df['gender'].dtype, pd.CategoricalDtype)
+        assert list(df['gender'].cat.categories) == ['Men']
+    
+    def test_title_arrow_string(self):
+        """Test that title is an Arrow-backed string column when pyarrow is installed"""
+        pytest.importorskip("pyarrow")
+        raw_data = [
+            Product("T-shirt 1", "$50.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men")
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert df['title'].dtype == 'string[pyarrow]'
+        assert df.iloc[0]['title'] == 'T-shirt 1'
+    
     def test_filter_unknown_product(self):
         """Test that Unknown Product is filtered out"""
         raw_data = [
@@ -215,6 +274,18 @@ class TestTransformData:
         assert len(df) == 1
         assert df.iloc[0]['title'] == 'T-shirt 1'
     
+    def test_filter_unknown_product_any_case(self):
+        """Test that Unknown Product is filtered regardless of case"""
+        raw_data = [
+            Product("UNKNOWN PRODUCT", "$50.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men"),
+            Product("unknown product", "$60.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men"),
+            Product("Unknown Products", "$70.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men")
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert list(df['title']) == ['Unknown Products']
+    
     def test_remove_duplicates(self):
         """Test that duplicates are removed"""
         raw_data = [
@@ -240,6 +311,32 @@ class TestTransformData:
         
         assert len(df) == 1
     
+    def test_remove_duplicates_by_title_and_price(self):
+        """Test that records sharing title and price are duplicates, first one kept"""
+        raw_data = [
+            {
+                "title": "T-shirt 1",
+                "price": "$50.00",
+                "rating": "⭐ 4.5 / 5",
+                "colors": "3 Colors",
+                "size": "Size: M",
+                "gender": "Gender: Men"
+            },
+            {
+                "title": "T-shirt 1",
+                "price": "$50.00",
+                "rating": "⭐ 3.0 / 5",
+                "colors": "5 Colors",
+                "size": "Size: L",
+                "gender": "Gender: Women"
+            }
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert len(df) == 1
+        assert df.iloc[0]['rating'] == 4.5
+    
     def test_remove_null_values(self):
         """Test that rows with null values are removed"""
         raw_data = [
@@ -266,11 +363,50 @@ class TestTransformData:
         assert len(df) == 1
         assert df.iloc[0]['title'] == 'T-shirt 2'
     
+    def test_transform_drops_oversized_colors(self):
+        """Test that an out-of-range color count drops the row instead of failing"""
+        raw_data = [
+            Product("T-shirt 1", "$50.00", "⭐ 4.5 / 5", "40000 Colors", "Size: M", "Gender: Men"),
+            Product("T-shirt 2", "$60.00", "⭐ 4.0 / 5", "2 Colors", "Size: L", "Gender: Men")
+        ]
+        
+        df = transform_data(raw_data)
+        
+        assert list(df['title']) == ['T-shirt 2']
+        assert df['colors'].dtype == 'int16'
+    
+    def test_transform_non_string_price(self):
+        """Test that a non-string price drops the row instead of failing"""
+        raw_data = [
+            {"title": "T-shirt 1", "price": 50.0, "rating": "⭐ 4.5 / 5",
+             "colors": "3 Colors", "size": "Size: M", "gender": "Gender: Men"},
+            {"title": "T-shirt 2", "price": "$60.00", "rating": "⭐ 4.0 / 5",
+             "colors": "2 Colors", "size": "Size: L", "gender": "Gender: Men"}
+        ]
+        
+        assert list(transform_data(raw_data)['title']) == ['T-shirt 2']
+        assert transform_data(raw_data[:1]).empty
+    
     def test_transform_empty_data(self):
         """Test transforming empty data"""
         df = transform_data([])
         
         assert df.empty
+        assert list(df.columns) == ['title', 'price', 'rating', 'colors', 'size', 'gender', 'timestamp']
+    
+    def test_transform_no_prices(self):
+        """Test that input without any usable price short-circuits to an empty frame"""
+        raw_data = [
+            Product("T-shirt 1", "Price Unavailable", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men"),
+            Product("T-shirt 2", None, "⭐ 4.0 / 5", "2 Colors", "Size: L", "Gender: Men")
+        ]
+        
+        with patch.object(transform, '_clean_records') as clean_records:
+            df = transform_data(raw_data)
+        
+        clean_records.assert_not_called()
+        assert df.empty
+        assert 'timestamp' in df.columns
     
     def test_timestamp_added(self):
         """Test that timestamp column is added"""
@@ -289,6 +425,45 @@ class TestTransformData:
         
         assert 'timestamp' in df.columns
         assert df.iloc[0]['timestamp'] is not None
+        assert df['timestamp'].dtype == 'datetime64[s]'
+    
+    def test_timestamp_passed_in(self):
+        """Test that a precomputed timestamp is used for every row"""
+        raw_data = [
+            Product("T-shirt 1", "$50.00", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men"),
+            Product("T-shirt 2", "$60.00", "⭐ 4.0 / 5", "2 Colors", "Size: L", "Gender: Men")
+        ]
+        run_time = datetime(2024, 1, 2, 3, 4, 5)
+        
+        df = transform_data(raw_data, timestamp=run_time)
+        
+        assert (df['timestamp'] == pd.Timestamp(run_time)).all()
+        assert df['timestamp'].dtype == 'datetime64[s]'
+    
+    def test_parallel_cleaning_matches_serial(self, caplog):
+        """Test that cleaning in worker processes gives the same rows in order"""
+        raw_data = [
+            Product(f"T-shirt {i}", f"${i}.50", "⭐ 4.5 / 5", "3 Colors", "Size: M", "Gender: Men")
+            for i in range(1, 60)
+        ]
+        raw_data[10] = raw_data[10]._replace(price="Price Unavailable")
+        
+        serial = transform_data(raw_data)
+        pool_spy = MagicMock(wraps=ProcessPoolExecutor)
+        with patch.object(transform, 'PARALLEL_MIN_ROWS', 1), \
+                patch.object(transform, '_PARALLEL_CHUNK_SIZE', 16), \
+                patch('utils.transform.os.cpu_count', return_value=2), \
+                patch('utils.transform.ProcessPoolExecutor', pool_spy):
+            parallel = transform_data(raw_data)
+        
+        # The pool must really have run; an in-process fallback would give
+        # the same frame
+        pool_spy.assert_called_once_with(max_workers=2)
+        assert "Parallel cleaning failed" not in caplog.text
+        assert len(parallel) == 58
+        pd.testing.assert_frame_equal(
+            parallel.drop(columns='timestamp'), serial.drop(columns='timestamp')
+        )
 
 
 class TestEdgeCases:
@@ -304,6 +479,15 @@ class TestEdgeCases:
         result = clean_rating("Rating: 10")
         assert result is None
     
+    def test_clean_rating_out_of_range_with_suffix(self):
+        """Test that neither an out-of-range rating nor the / 5 denominator is taken"""
+        assert clean_rating("⭐ 10 / 5") is None
+        assert clean_rating("Rating: ⭐ Invalid Rating / 5") is None
+        assert clean_rating("Rating: ⭐ Invalid Rating /  5") is None
+        assert clean_rating("Invalid Rating 5") is None
+        assert clean_rating("Rating: ⭐ N/A /  5") is None
+        assert clean_rating("⭐ 5.0 / 5") == 5.0
+    
     def test_clean_rating_just_number(self):
         """Test cleaning rating with just a number in valid range"""
         result = clean_rating("4.2")
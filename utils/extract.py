@@ -3,11 +3,23 @@ Extract module for Fashion Studio ETL Pipeline
 Scrapes product data from Fashion Studio website
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree
 import time
 import logging
 import re
+from typing import NamedTuple
+
+# aiohttp drives the default concurrent fetcher; without it pages are
+# fetched with a thread pool over fetch_page instead
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,74 +27,155 @@ logger = logging.getLogger(__name__)
 
 BASE_URL = "https://fashion-studio.dicoding.dev"
 
+# Maximum number of pages fetched at the same time
+MAX_CONCURRENCY = 8
+
+# Bytes read from the response stream per parser feed
+_CHUNK_SIZE = 8192
+
 
-def extract_product_from_card(card) -> dict:
+def _new_session(session_cls=requests.Session) -> requests.Session:
+    """
+    Create a pooled session for fetch_page.
+    
+    Retries are handled by fetch_page itself, so the adapter does not retry.
+    """
+    session = session_cls()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=0))
+    return session
+
+
+# Shared session so repeated fetch_page calls reuse keep-alive connections
+_SESSION = _new_session()
+
+# Set by enable_cache() once _SESSION is a caching session
+_CACHE_ENABLED = False
+
+
+# Parser reused for every page parsed by extract_products_from_page. lxml
+# parsers must not be shared across threads; all callers parse on the
+# calling thread (the threaded fetcher only fetches in its workers).
+# No encoding is forced, so libxml2 honours the page's <meta charset>.
+_HTML_PARSER = etree.HTMLParser(recover=True, remove_blank_text=True)
+
+
+def _class_xpath(tag: str, class_name: str, prefix: str = ".//") -> etree.XPath:
+    """Compile an XPath matching `tag` elements carrying `class_name` as a class token."""
+    return etree.XPath(
+        f"{prefix}{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+    )
+
+
+# Selectors are compiled once at import and reused for every page and card
+_CARD_XP = _class_xpath("div", "collection-card", prefix="//")
+_TITLE_XP = _class_xpath("h3", "product-title")
+_PRICE_XP = _class_xpath("span", "price")
+_P_XP = etree.XPath(".//p")
+
+# Order of the <p> tags on a standard Fashion Studio card
+_P_LAYOUT = ("rating", "colors", "size", "gender")
+
+# Classifies a card's <p> tags in a single scan; the first keyword found
+# in the text decides the field via _KEY_MAP.
+_FIELD_RE = re.compile(r"(⭐|rating|color|size|gender)", re.IGNORECASE)
+_KEY_MAP = {
+    "⭐": "rating",
+    "rating": "rating",
+    "color": "colors",
+    "size": "size",
+    "gender": "gender",
+}
+
+
+def _text(elem) -> str:
+    """Return the stripped text of an element, like BeautifulSoup's get_text(strip=True)."""
+    return "".join(part.strip() for part in elem.itertext())
+
+
+class Product(NamedTuple):
+    """Raw product data scraped from a single card."""
+    title: str
+    price: str
+    rating: str
+    colors: str
+    size: str
+    gender: str
+
+
+def extract_product_from_card(card) -> Product:
     """
     Extract product data from a single product card HTML element.
     
     Args:
-        card: BeautifulSoup element representing a product card
+        card: lxml element representing a product card
         
     Returns:
-        dict: Product data with keys: title, price, rating, colors, size, gender
+        Product: Product data with fields: title, price, rating, colors, size, gender
     """
     try:
         # Extract title from h3.product-title
-        title_elem = card.select_one("h3.product-title")
-        title = title_elem.get_text(strip=True) if title_elem else "Unknown Product"
+        title_elems = _TITLE_XP(card)
+        title = _text(title_elems[0]) if title_elems else "Unknown Product"
         
         # Extract price from span.price
-        price_elem = card.select_one("span.price")
-        price = price_elem.get_text(strip=True) if price_elem else "Price Unavailable"
+        price_elems = _PRICE_XP(card)
+        price = _text(price_elems[0]) if price_elems else "Price Unavailable"
         
         # Extract other details from <p> tags
-        p_tags = card.select("p")
+        texts = [_text(p) for p in _P_XP(card)]
         
-        rating = ""
-        colors = ""
-        size = ""
-        gender = ""
+        if len(texts) == len(_P_LAYOUT) and "⭐" in texts[0]:
+            # Standard card layout, fields can be taken by position
+            return Product(title, price, *texts)
         
-        for p in p_tags:
-            text = p.get_text(strip=True)
-            text_lower = text.lower()
-            if "rating" in text_lower or "⭐" in text:
-                rating = text
-            elif "color" in text_lower:
-                colors = text
-            elif "size" in text_lower:
-                size = text
-            elif "gender" in text_lower:
-                gender = text
+        # Unexpected layout, classify each tag by keyword
+        fields = dict.fromkeys(_P_LAYOUT, "")
+        for text in texts:
+            match = _FIELD_RE.search(text)
+            if match:
+                fields[_KEY_MAP[match.group(1).lower()]] = text
         
-        return {
-            "title": title,
-            "price": price,
-            "rating": rating,
-            "colors": colors,
-            "size": size,
-            "gender": gender
-        }
+        return Product(title, price, **fields)
     except Exception as e:
-        logger.error(f"Error extracting product from card: {e}")
+        logger.error("Error extracting product from card: %s", e)
         return None
 
 
-def extract_products_from_page(html_content: str) -> list:
+def extract_products_from_page(html_content: bytes | str) -> list:
     """
     Extract all products from a page's HTML content.
     
     Args:
-        html_content: Raw HTML string of the page
+        html_content: Raw HTML of the page, as UTF-8 bytes (preferred, no
+            decode step) or an already decoded string
+        
+    Returns:
+        list: List of Product records
+    """
+    # Skip parsing entirely for pages without any product cards
+    marker = b"collection-card" if isinstance(html_content, bytes) else "collection-card"
+    if marker not in html_content:
+        return []
+    
+    return _extract_products_from_tree(etree.fromstring(html_content, _HTML_PARSER))
+
+
+def _extract_products_from_tree(tree) -> list:
+    """
+    Extract all products from an already parsed page.
+    
+    Args:
+        tree: Root lxml element of the page, or None for an empty page
         
     Returns:
-        list: List of product dictionaries
+        list: List of Product records
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
     products = []
+    if tree is None:
+        return products
     
     # Find all product cards using the correct class
-    cards = soup.select("div.collection-card")
+    cards = _CARD_XP(tree)
     
     for card in cards:
         product = extract_product_from_card(card)
@@ -92,80 +185,291 @@ def extract_products_from_page(html_content: str) -> list:
     return products
 
 
-def fetch_page(url: str, retries: int = 3, timeout: int = 10) -> str:
+def fetch_page(url: str, retries: int = 3, timeout: int = 10) -> bytes:
     """
     Fetch a page with retry logic and error handling.
     
+    The raw body is returned undecoded; extract_products_from_page hands it
+    straight to lxml, which parses the bytes without a separate decode.
+    
     Args:
         url: URL to fetch
         retries: Number of retry attempts
         timeout: Request timeout in seconds
         
     Returns:
-        str: HTML content of the page
+        bytes: Raw HTML content of the page
         
     Raises:
         Exception: If all retries fail
     """
     for attempt in range(retries):
         try:
-            response = requests.get(url, timeout=timeout)
+            response = _SESSION.get(url, timeout=timeout)
             response.raise_for_status()
-            return response.text
+            return response.content
         except requests.exceptions.Timeout:
-            logger.warning(f"Timeout on attempt {attempt + 1} for {url}")
+            logger.warning("Timeout on attempt %d for %s", attempt + 1, url)
             if attempt < retries - 1:
                 time.sleep(2 ** attempt)  # Exponential backoff
             else:
                 raise Exception(f"Failed to fetch {url} after {retries} attempts: Timeout")
         except requests.exceptions.RequestException as e:
-            logger.warning(f"Request error on attempt {attempt + 1} for {url}: {e}")
+            logger.warning("Request error on attempt %d for %s: %s", attempt + 1, url, e)
             if attempt < retries - 1:
                 time.sleep(2 ** attempt)
             else:
                 raise Exception(f"Failed to fetch {url} after {retries} attempts: {e}")
     
-    return ""
+    return b""
 
 
-def extract_all_pages(base_url: str = BASE_URL, max_pages: int = 50) -> list:
+def enable_cache(cache_name: str = "fashion_cache", expire_after: int = 3600) -> None:
     """
-    Extract products from all pages of the Fashion Studio website.
+    Route fetch_page through an on-disk HTTP cache.
+    
+    Meant for development, where the same pages are fetched over and over:
+    responses are kept in a SQLite file and reused until they expire.
+    Once enabled, extract_all_pages also goes through fetch_page so the
+    cache applies to full scrapes. Requires the optional `requests-cache`
+    package.
     
     Args:
-        base_url: Base URL of the website
-        max_pages: Maximum number of pages to scrape
+        cache_name: Base name of the SQLite cache file
+        expire_after: Seconds a cached page stays valid
+    """
+    import requests_cache
+    
+    global _SESSION, _CACHE_ENABLED
+    _SESSION.close()
+    _SESSION = _new_session(
+        lambda: requests_cache.CachedSession(cache_name, backend="sqlite", expire_after=expire_after)
+    )
+    _CACHE_ENABLED = True
+    logger.info("HTTP cache enabled: %s.sqlite (expires after %ds)", cache_name, expire_after)
+
+
+def _close_parser(parser: etree.HTMLParser):
+    """Finish a feed parse, returning the root element or None for an empty body."""
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+
+
+async def _fetch(session: "aiohttp.ClientSession", sem: asyncio.Semaphore, url: str,
+                 retries: int = 3):
+    """
+    Fetch and parse a page asynchronously with the same retry policy as fetch_page.
+    
+    The body is fed to an lxml parser chunk by chunk as it arrives, so
+    parsing overlaps the download instead of waiting for the full response.
+    A concurrency slot from `sem` is held only while a request is in
+    flight; it is released during backoff so other pages keep going.
+    
+    Args:
+        session: Shared aiohttp session
+        sem: Semaphore bounding the number of requests in flight
+        url: URL to fetch
+        retries: Number of retry attempts
         
     Returns:
-        list: List of all product dictionaries from all pages
+        Root lxml element of the page, or None if the body was empty
+        
+    Raises:
+        Exception: If all retries fail
     """
-    all_products = []
-    
-    for page_num in range(1, max_pages + 1):
+    for attempt in range(retries):
         try:
-            # Construct URL
-            if page_num == 1:
-                url = base_url
+            async with sem:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    # A fresh parser per attempt, so a retry never sees a partial page.
+                    # Without an HTTP charset, libxml2 reads the page's <meta charset>
+                    parser = etree.HTMLParser(encoding=response.charset)
+                    async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                        parser.feed(chunk)
+                    return _close_parser(parser)
+        except asyncio.TimeoutError:
+            logger.warning("Timeout on attempt %d for %s", attempt + 1, url)
+            if attempt < retries - 1:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
             else:
-                url = f"{base_url}/page{page_num}"
-            
-            logger.info(f"Scraping page {page_num}: {url}")
-            
-            # Fetch and parse page
-            html_content = fetch_page(url)
+                raise Exception(f"Failed to fetch {url} after {retries} attempts: Timeout")
+        except aiohttp.ClientError as e:
+            logger.warning("Request error on attempt %d for %s: %s", attempt + 1, url, e)
+            if attempt < retries - 1:
+                await asyncio.sleep(2 ** attempt)
+            else:
+                raise Exception(f"Failed to fetch {url} after {retries} attempts: {e}")
+    
+    return None
+
+
+async def _fetch_and_parse(sem: asyncio.Semaphore, session: "aiohttp.ClientSession",
+                           page_num: int, url: str, delay: float = 0.0) -> list:
+    """
+    Fetch and parse a single page, logging and swallowing any error.
+    
+    With a positive `delay`, page N waits (N - 1) * delay seconds before
+    requesting, so request starts are spaced out without serializing pages.
+    
+    Returns:
+        list: Products found on the page, or an empty list on failure
+    """
+    if delay > 0:
+        await asyncio.sleep((page_num - 1) * delay)
+    
+    try:
+        logger.debug("Scraping page %d: %s", page_num, url)
+        tree = await _fetch(session, sem, url)
+        products = _extract_products_from_tree(tree)
+        logger.debug("Extracted %d products from page %d", len(products), page_num)
+        return products
+    except Exception as e:
+        logger.error("Error scraping page %d: %s", page_num, e)
+        return []
+
+
+def _page_urls(base_url: str, max_pages: int) -> list:
+    """Build the URLs of pages 1..max_pages; page 1 is the base URL itself."""
+    return [base_url if page_num == 1 else f"{base_url}/page{page_num}"
+            for page_num in range(1, max_pages + 1)]
+
+
+async def _extract_all_pages_async(base_url: str, max_pages: int, concurrency: int,
+                                   delay: float) -> list:
+    """
+    Fetch and parse all pages concurrently over one aiohttp session.
+    
+    Returns:
+        list: List of all Product records, in page order
+    """
+    urls = _page_urls(base_url, max_pages)
+    
+    sem = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # gather() keeps results in the same order as the URLs
+        results = await asyncio.gather(
+            *[_fetch_and_parse(sem, session, page_num, url, delay)
+              for page_num, url in enumerate(urls, start=1)]
+        )
+    
+    return list(chain.from_iterable(results))
+
+
+def _fetch_page_safe(page_num: int, url: str, delay: float = 0.0, start: float = None):
+    """
+    Fetch a single page with fetch_page, logging and swallowing any error.
+    
+    Args:
+        page_num: 1-based page number
+        url: URL of the page
+        delay: Spacing in seconds between request starts
+        start: time.monotonic() value the spacing is measured from; defaults
+            to now
+    
+    Returns:
+        bytes: Raw HTML of the page, or None on failure
+    """
+    if delay > 0:
+        # Wait until this page's slot relative to the shared start time, so
+        # the time a worker spent on earlier pages is not waited again
+        if start is None:
+            start = time.monotonic()
+        wait = start + (page_num - 1) * delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+    
+    try:
+        logger.debug("Scraping page %d: %s", page_num, url)
+        return fetch_page(url)
+    except Exception as e:
+        logger.error("Error scraping page %d: %s", page_num, e)
+        return None
+
+
+def _extract_all_pages_threaded(base_url: str, max_pages: int, concurrency: int,
+                                delay: float) -> list:
+    """
+    Fetch all pages with a thread pool over fetch_page, then parse them in order.
+    
+    requests releases the GIL while waiting on the socket, so the threads
+    overlap network I/O. Parsing stays on the calling thread.
+    
+    Returns:
+        list: List of all Product records, in page order
+    """
+    urls = _page_urls(base_url, max_pages)
+    page_nums = range(1, len(urls) + 1)
+    
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pages = list(executor.map(_fetch_page_safe, page_nums, urls,
+                                  [delay] * len(urls), [start] * len(urls)))
+    
+    all_products = []
+    for page_num, html_content in zip(page_nums, pages):
+        if html_content is None:
+            continue
+        try:
             products = extract_products_from_page(html_content)
-            
-            all_products.extend(products)
-            logger.info(f"Extracted {len(products)} products from page {page_num}")
-            
-            # Be polite to the server
-            time.sleep(0.5)
-            
+            logger.debug("Extracted %d products from page %d", len(products), page_num)
+            all_products += products
         except Exception as e:
-            logger.error(f"Error scraping page {page_num}: {e}")
-            continue
+            logger.error("Error scraping page %d: %s", page_num, e)
+    
+    return all_products
+
+
+def _in_event_loop() -> bool:
+    """
+    Tell whether the calling thread is already running an asyncio event loop.
+    
+    Returns:
+        bool: True inside a running loop (e.g. Jupyter or an async caller)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def extract_all_pages(base_url: str = BASE_URL, max_pages: int = 50,
+                      concurrency: int = MAX_CONCURRENCY, delay: float = 0.0) -> list:
+    """
+    Extract products from all pages of the Fashion Studio website.
+    
+    Pages are fetched concurrently, with at most `concurrency` requests
+    in flight at once. aiohttp is used when available; otherwise, when the
+    HTTP cache is enabled, or when called from a running event loop (where
+    asyncio.run is not allowed), a thread pool runs fetch_page.
+    
+    Args:
+        base_url: Base URL of the website
+        max_pages: Maximum number of pages to scrape
+        concurrency: Maximum number of simultaneous requests
+        delay: Minimum spacing in seconds between request starts (0 disables)
+        
+    Returns:
+        list: List of all Product records from all pages
+        
+    Raises:
+        ValueError: If concurrency is less than 1
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    
+    if aiohttp is None or _CACHE_ENABLED or _in_event_loop():
+        all_products = _extract_all_pages_threaded(base_url, max_pages, concurrency, delay)
+    else:
+        all_products = asyncio.run(
+            _extract_all_pages_async(base_url, max_pages, concurrency, delay)
+        )
     
-    logger.info(f"Total products extracted: {len(all_products)}")
+    logger.info("Total products extracted: %d", len(all_products))
     return all_products
 
 
@@ -1,20 +1,174 @@
 """
 Load module for Fashion Studio ETL Pipeline
-Saves transformed data to CSV
+Saves transformed data to CSV, Parquet or Feather
 """
 
+import numpy as np
 import pandas as pd
 import logging
 
+# pyarrow's C++ CSV writer is much faster than pandas' to_csv; it is optional
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# Parquet and Feather output need pyarrow
+PYARROW_AVAILABLE = pa is not None
+
+# Format of datetime columns in the CSV output
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Both CSV writers end lines with '\n', whatever the platform
+LINE_TERMINATOR = '\n'
+
+# The header is written separately, in the pandas format. pyarrow's only
+# non-quoting style refuses values that would need quotes; those frames
+# fall back to pandas, so both writers produce the same bytes
+_CSV_WRITE_OPTIONS = (
+    pacsv.WriteOptions(include_header=False, quoting_style='none')
+    if pa is not None else None
+)
+
+# Outside this magnitude range Python's repr (used by pandas) and Arrow
+# switch to exponent notation at different points ("1e-05" vs "0.00001",
+# "12345678901.5" vs "1.23456789015e+10")
+_MIN_PLAIN_FLOAT = 1e-4
+_MAX_PLAIN_FLOAT = 1e10
+
+# Write buffer for both CSV paths (1 MiB)
+_WRITE_BUFFER = 1 << 20
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _arrow_can_write(df: pd.DataFrame) -> bool:
+    """
+    Tell whether pyarrow can write df exactly as pandas' to_csv would.
+    
+    Only an allowlist of column types qualifies: strings (object or string
+    dtype), integers, float64 within the plain-notation range, tz-naive
+    datetimes and categoricals of strings. Anything else, and single-column
+    frames (pandas writes a lone empty field as ""), goes to pandas.
+    
+    Args:
+        df: DataFrame to check
+        
+    Returns:
+        bool: True if the pyarrow writer may be used
+    """
+    if df.shape[1] < 2:
+        return False
+    
+    for _, column in df.items():
+        dtype = column.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            if pd.api.types.infer_dtype(dtype.categories, skipna=True) != 'string':
+                return False
+        elif isinstance(dtype, pd.StringDtype):
+            continue
+        elif dtype == object:
+            if pd.api.types.infer_dtype(column, skipna=True) not in ('string', 'empty'):
+                return False
+        elif pd.api.types.is_integer_dtype(dtype):
+            continue
+        elif dtype == np.float64:
+            magnitude = np.abs(column.to_numpy())
+            magnitude = magnitude[np.isfinite(magnitude) & (magnitude != 0)]
+            if magnitude.size and (magnitude.min() < _MIN_PLAIN_FLOAT
+                                   or magnitude.max() >= _MAX_PLAIN_FLOAT):
+                return False
+        elif not (isinstance(dtype, np.dtype) and dtype.kind == 'M'):
+            # Booleans, float32, timedeltas, tz-aware timestamps, ...
+            return False
+    return True
+
+
+def _to_csv_table(df: pd.DataFrame):
+    """
+    Convert a DataFrame that passed _arrow_can_write to an Arrow table.
+    
+    Float columns are rendered to text with pandas' repr-style formatting
+    (integral values keep their ".0") and timestamps are floored to seconds,
+    as strftime does.
+    
+    Args:
+        df: DataFrame to convert
+        
+    Returns:
+        pa.Table: Table ready for pacsv.write_csv
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        if pa.types.is_floating(field.type):
+            text = pc.cast(column, pa.string())
+            integral = pc.match_substring_regex(text, r'^-?\d+$')
+            text = pc.if_else(integral, pc.binary_join_element_wise(text, '.0', ''), text)
+            table = table.set_column(i, field.name, text)
+        elif pa.types.is_timestamp(field.type) and field.type.unit != 's':
+            # A plain cast truncates towards zero, which is wrong before 1970
+            seconds = pc.floor_temporal(column, unit='second')
+            table = table.set_column(
+                i, field.name, pc.cast(seconds, pa.timestamp('s'), safe=False)
+            )
+    return table
+
+
+def _write_csv_pandas(df: pd.DataFrame, filepath: str):
+    """
+    Write a DataFrame with pandas' to_csv.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Path to output CSV file
+    """
+    # pandas has no pyarrow engine for to_csv (only read_csv); it already
+    # formats in row chunks, so one large buffer keeps its many small
+    # writes out of the syscall path
+    with open(filepath, 'w', newline='', buffering=_WRITE_BUFFER, encoding='utf-8') as f:
+        df.to_csv(f, index=False, date_format=DATE_FORMAT, lineterminator=LINE_TERMINATOR)
+
+
+def _write_csv_arrow(df: pd.DataFrame, filepath: str) -> bool:
+    """
+    Write a DataFrame with pyarrow's CSV writer, byte-identical to pandas.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Path to output CSV file
+        
+    Returns:
+        bool: True if written, False if the data needs the pandas writer
+    """
+    if not _arrow_can_write(df):
+        return False
+    
+    header = df.iloc[:0].to_csv(index=False, lineterminator=LINE_TERMINATOR)
+    try:
+        table = _to_csv_table(df)
+        with open(filepath, 'wb', buffering=_WRITE_BUFFER) as f:
+            f.write(header.encode('utf-8'))
+            pacsv.write_csv(table, f, write_options=_CSV_WRITE_OPTIONS)
+    except (pa.ArrowException, TypeError):
+        # A value needs quoting (comma, quote or newline) or Arrow cannot
+        # convert the column; the pandas writer handles both
+        return False
+    return True
+
+
 def load_to_csv(df: pd.DataFrame, filepath: str = "products.csv") -> bool:
     """
     Save DataFrame to CSV file.
     
+    Uses pyarrow's CSV writer when pyarrow is installed and the column types
+    are ones it writes exactly as pandas would; everything else (and every
+    frame without pyarrow) is written by pandas' to_csv.
+    
     Args:
         df: DataFrame to save
         filepath: Path to output CSV file
@@ -27,12 +181,68 @@ def load_to_csv(df: pd.DataFrame, filepath: str = "products.csv") -> bool:
             logger.warning("Cannot save empty DataFrame to CSV")
             return False
         
-        df.to_csv(filepath, index=False)
-        logger.info(f"Data saved to CSV: {filepath} ({len(df)} rows)")
+        if pa is None or not _write_csv_arrow(df, filepath):
+            _write_csv_pandas(df, filepath)
+        logger.info("Data saved to CSV: %s (%d rows)", filepath, len(df))
         return True
         
     except Exception as e:
-        logger.error(f"Error saving to CSV: {e}")
+        logger.error("Error saving to CSV: %s", e)
+        return False
+
+
+def load_to_parquet(df: pd.DataFrame, filepath: str = "products.parquet") -> bool:
+    """
+    Save DataFrame to a snappy-compressed Parquet file.
+    
+    Requires pyarrow.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Path to output Parquet file
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if df.empty:
+            logger.warning("Cannot save empty DataFrame to Parquet")
+            return False
+        
+        df.to_parquet(filepath, engine='pyarrow', compression='snappy', index=False)
+        logger.info("Data saved to Parquet: %s (%d rows)", filepath, len(df))
+        return True
+        
+    except Exception as e:
+        logger.error("Error saving to Parquet: %s", e)
+        return False
+
+
+def load_to_feather(df: pd.DataFrame, filepath: str = "products.feather") -> bool:
+    """
+    Save DataFrame to an lz4-compressed Feather file.
+    
+    Requires pyarrow.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Path to output Feather file
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if df.empty:
+            logger.warning("Cannot save empty DataFrame to Feather")
+            return False
+        
+        # Feather stores no index, so it must be a plain RangeIndex
+        df.reset_index(drop=True).to_feather(filepath, compression='lz4')
+        logger.info("Data saved to Feather: %s (%d rows)", filepath, len(df))
+        return True
+        
+    except Exception as e:
+        logger.error("Error saving to Feather: %s", e)
         return False
 
 
@@ -50,3 +260,7 @@ if __name__ == "__main__":
     
     # Test CSV
     load_to_csv(sample_df, "test_products.csv")
+    
+    # Test Parquet and Feather
+    load_to_parquet(sample_df, "test_products.parquet")
+    load_to_feather(sample_df, "test_products.feather")
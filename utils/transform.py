@@ -3,11 +3,22 @@ Transform module for Fashion Studio ETL Pipeline
 Cleans and transforms raw product data
 """
 
+import numpy as np
 import pandas as pd
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain
 import logging
 
+# pyarrow backs the title column with one contiguous string buffer; it is optional
+try:
+    import pyarrow  # noqa: F401
+    _TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    _TEXT_DTYPE = object
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,6 +26,34 @@ logger = logging.getLogger(__name__)
 # Currency conversion rate
 USD_TO_IDR = 16000
 
+# Patterns compiled once at import and reused for every row
+_PRICE_RE = re.compile(r'(\d+\.?\d*)')
+# A number in the 0-5 range, with or without the " / 5" suffix; the
+# lookarounds stop it matching inside larger numbers such as "10".
+# clean_rating rejects a match that is the "/ 5" denominator itself
+_RATING_RE = re.compile(r'(?<![\d./])([0-4](?:\.\d*)?|5(?:\.0*)?)(?![\d.])')
+_COLORS_RE = re.compile(r'(\d+)')
+
+# The colors column is stored as int16; larger counts are treated as invalid
+_MAX_COLORS = int(np.iinfo(np.int16).max)
+
+# Placeholder title the site uses for broken listings (compared case-insensitively)
+_UNKNOWN_TITLE = 'unknown product'
+
+# Literal field labels stripped (case-insensitively) by clean_size/clean_gender
+_SIZE_PREFIX = 'size:'
+_GENDER_PREFIX = 'gender:'
+
+# Raw fields produced by the extractor, in column order
+RAW_COLUMNS = ['title', 'price', 'rating', 'colors', 'size', 'gender']
+# Columns of the transformed DataFrame
+OUTPUT_COLUMNS = RAW_COLUMNS + ['timestamp']
+
+# Below this many rows, starting worker processes costs more than it saves
+PARALLEL_MIN_ROWS = 10_000
+# Records sent to a worker per task; large enough to amortize the pickling
+_PARALLEL_CHUNK_SIZE = 5_000
+
 
 def clean_price(price_str: str) -> float:
     """
@@ -31,13 +70,13 @@ def clean_price(price_str: str) -> float:
             return None
         
         # Remove currency symbols and extract number
-        price_match = re.search(r'[\d,]+\.?\d*', price_str.replace(',', ''))
+        price_match = _PRICE_RE.search(price_str.replace(',', ''))
         if price_match:
             price_usd = float(price_match.group())
             return price_usd * USD_TO_IDR
         return None
     except Exception as e:
-        logger.warning(f"Error cleaning price '{price_str}': {e}")
+        logger.warning("Error cleaning price '%s': %s", price_str, e)
         return None
 
 
@@ -55,20 +94,16 @@ def clean_rating(rating_str: str) -> float:
         if not rating_str or "invalid" in rating_str.lower():
             return None
         
-        # Extract number from rating string
-        rating_match = re.search(r'(\d+\.?\d*)\s*/\s*5', rating_str)
-        if rating_match:
-            return float(rating_match.group(1))
-        
-        # Try to find any float number
-        rating_match = re.search(r'(\d+\.?\d*)', rating_str)
-        if rating_match:
-            rating = float(rating_match.group(1))
-            if 0 <= rating <= 5:
-                return rating
-        return None
+        # Extract the rating; out-of-range numbers simply do not match
+        rating_match = _RATING_RE.search(rating_str)
+        if rating_match is None:
+            return None
+        # Whatever the spacing, a number right after "/" is the denominator
+        if rating_str[:rating_match.start()].rstrip().endswith('/'):
+            return None
+        return float(rating_match.group(1))
     except Exception as e:
-        logger.warning(f"Error cleaning rating '{rating_str}': {e}")
+        logger.warning("Error cleaning rating '%s': %s", rating_str, e)
         return None
 
 
@@ -80,19 +115,20 @@ def clean_colors(colors_str: str) -> int:
         colors_str: Raw colors string (e.g., "3 Colors")
         
     Returns:
-        int: Number of colors, or None if invalid
+        int: Number of colors, or None if invalid or too large for int16
     """
     try:
         if not colors_str:
             return None
         
         # Extract number
-        colors_match = re.search(r'(\d+)', colors_str)
+        colors_match = _COLORS_RE.search(colors_str)
         if colors_match:
-            return int(colors_match.group(1))
+            colors = int(colors_match.group(1))
+            return colors if colors <= _MAX_COLORS else None
         return None
     except Exception as e:
-        logger.warning(f"Error cleaning colors '{colors_str}': {e}")
+        logger.warning("Error cleaning colors '%s': %s", colors_str, e)
         return None
 
 
@@ -110,11 +146,12 @@ def clean_size(size_str: str) -> str:
         if not size_str:
             return None
         
-        # Remove "Size: " prefix
-        cleaned = re.sub(r'^Size:\s*', '', size_str, flags=re.IGNORECASE)
-        return cleaned.strip() if cleaned.strip() else None
+        # Remove "Size: " prefix; a literal slice needs no regex
+        if size_str[:len(_SIZE_PREFIX)].lower() == _SIZE_PREFIX:
+            size_str = size_str[len(_SIZE_PREFIX):]
+        return size_str.strip() or None
     except Exception as e:
-        logger.warning(f"Error cleaning size '{size_str}': {e}")
+        logger.warning("Error cleaning size '%s': %s", size_str, e)
         return None
 
 
@@ -132,20 +169,123 @@ def clean_gender(gender_str: str) -> str:
         if not gender_str:
             return None
         
-        # Remove "Gender: " prefix
-        cleaned = re.sub(r'^Gender:\s*', '', gender_str, flags=re.IGNORECASE)
-        return cleaned.strip() if cleaned.strip() else None
+        # Remove "Gender: " prefix; a literal slice needs no regex
+        if gender_str[:len(_GENDER_PREFIX)].lower() == _GENDER_PREFIX:
+            gender_str = gender_str[len(_GENDER_PREFIX):]
+        return gender_str.strip() or None
     except Exception as e:
-        logger.warning(f"Error cleaning gender '{gender_str}': {e}")
+        logger.warning("Error cleaning gender '%s': %s", gender_str, e)
         return None
 
 
-def transform_data(raw_data: list) -> pd.DataFrame:
+def _iter_records(raw_data: list):
+    """
+    Yield each raw product record as a tuple in RAW_COLUMNS order.
+    
+    Args:
+        raw_data: Product tuples or dictionaries with the RAW_COLUMNS keys
+    """
+    if isinstance(raw_data[0], tuple):
+        # Product records already are tuples in column order
+        return iter(raw_data)
+    return (tuple(record.get(col) for col in RAW_COLUMNS) for record in raw_data)
+
+
+def _clean_row(record: tuple) -> tuple:
+    """
+    Clean every field of one raw record.
+    
+    Args:
+        record: Raw (title, price, rating, colors, size, gender) tuple
+        
+    Returns:
+        tuple: Cleaned values in the same order; invalid fields are None
+    """
+    title, price, rating, colors, size, gender = record
+    return (
+        title,
+        clean_price(price),
+        clean_rating(rating),
+        clean_colors(colors),
+        clean_size(size),
+        clean_gender(gender),
+    )
+
+
+def _clean_chunk(records: list) -> list:
+    """
+    Clean a batch of raw records; runs inside a worker process.
+    
+    Args:
+        records: Raw record tuples
+        
+    Returns:
+        list: Cleaned tuples, one per record
+    """
+    return [_clean_row(record) for record in records]
+
+
+def _clean_records(records: list):
+    """
+    Clean raw records, spreading the work over CPU cores for large inputs.
+    
+    The cleaners are pure Python, so threads would not help; a process pool
+    is used once there are at least PARALLEL_MIN_ROWS records and more than
+    one core. If the pool cannot be used the records are cleaned in-process.
+    
+    Args:
+        records: Raw record tuples
+        
+    Returns:
+        Iterable of cleaned tuples, in input order
+    """
+    workers = os.cpu_count() or 1
+    if len(records) < PARALLEL_MIN_ROWS or workers < 2:
+        return map(_clean_row, records)
+    
+    chunks = [
+        records[i:i + _PARALLEL_CHUNK_SIZE]
+        for i in range(0, len(records), _PARALLEL_CHUNK_SIZE)
+    ]
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            return list(chain.from_iterable(pool.map(_clean_chunk, chunks)))
+    except Exception as e:
+        logger.warning("Parallel cleaning failed, cleaning in-process: %s", e)
+        return map(_clean_row, records)
+
+
+def _has_price(price_str: str) -> bool:
+    """
+    Cheaply tell whether a raw price could survive clean_price.
+    
+    Args:
+        price_str: Raw price string
+        
+    Returns:
+        bool: False for missing, non-string or "Price Unavailable" values
+    """
+    # clean_price rejects anything that is not a string, so it never survives
+    return (isinstance(price_str, str) and bool(price_str)
+            and "unavailable" not in price_str.lower())
+
+
+def transform_data(raw_data: list, timestamp: np.datetime64 = None) -> pd.DataFrame:
     """
     Transform raw product data into a clean DataFrame.
     
+    Empty input, or input where no product has a price, returns an empty
+    DataFrame with the output columns right away. Otherwise duplicates (same
+    raw title and price, first one kept) and "Unknown Product" entries are
+    skipped in one pass over the raw records. The rest are cleaned (in worker
+    processes for large inputs), rows with any invalid field are dropped, and
+    the DataFrame is built once from per-column lists.
+    
     Args:
-        raw_data: List of dictionaries with raw product data
+        raw_data: List of Product records or dictionaries with raw product data
+        timestamp: Value for the timestamp column; defaults to the current
+            local time. Batch pipelines can compute it once and pass it to
+            every call so all batches share one run time.
         
     Returns:
         pd.DataFrame: Cleaned and transformed data
@@ -153,53 +293,77 @@ def transform_data(raw_data: list) -> pd.DataFrame:
     try:
         if not raw_data:
             logger.warning("No data to transform")
-            return pd.DataFrame()
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(raw_data)
-        logger.info(f"Initial data: {len(df)} rows")
-        
-        # Remove duplicates
-        initial_count = len(df)
-        df = df.drop_duplicates()
-        logger.info(f"After removing duplicates: {len(df)} rows (removed {initial_count - len(df)})")
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
         
-        # Filter out "Unknown Product"
-        initial_count = len(df)
-        df = df[df['title'].str.lower() != 'unknown product']
-        logger.info(f"After filtering Unknown Product: {len(df)} rows (removed {initial_count - len(df)})")
+        logger.info("Initial data: %d rows", len(raw_data))
         
-        # Clean price (convert to IDR)
-        df['price'] = df['price'].apply(clean_price)
+        # Every row would be dropped for its price; any() stops at the first
+        # usable price, so this costs next to nothing on normal input
+        if not any(_has_price(record[1]) for record in _iter_records(raw_data)):
+            logger.warning("No product has a price, nothing to transform")
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
         
-        # Clean rating
-        df['rating'] = df['rating'].apply(clean_rating)
+        seen = set()
+        duplicates = 0
+        unknown = 0
         
-        # Clean colors
-        df['colors'] = df['colors'].apply(clean_colors)
+        pending = []
+        for record in _iter_records(raw_data):
+            # Remove duplicates; a product is identified by its raw title and price
+            key = record[:2]
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            
+            # Filter out "Unknown Product"; only titles of the same length
+            # can match, so the rest skip the lower() copy
+            title = record[0]
+            if (isinstance(title, str) and len(title) == len(_UNKNOWN_TITLE)
+                    and title.lower() == _UNKNOWN_TITLE):
+                unknown += 1
+                continue
+            
+            pending.append(record)
         
-        # Clean size
-        df['size'] = df['size'].apply(clean_size)
+        # Remove rows with null values as they are cleaned, so the
+        # DataFrame never needs a dropna() pass
+        rows = [row for row in _clean_records(pending) if None not in row]
+        incomplete = len(pending) - len(rows)
         
-        # Clean gender
-        df['gender'] = df['gender'].apply(clean_gender)
+        remaining = len(raw_data) - duplicates
+        logger.info("After removing duplicates: %d rows (removed %d)", remaining, duplicates)
+        remaining -= unknown
+        logger.info("After filtering Unknown Product: %d rows (removed %d)", remaining, unknown)
+        logger.info("After removing null values: %d rows (removed %d)", len(rows), incomplete)
         
-        # Remove rows with null values
-        initial_count = len(df)
-        df = df.dropna()
-        logger.info(f"After removing null values: {len(df)} rows (removed {initial_count - len(df)})")
+        # Transpose the row tuples into columns in one C-level pass
+        columns = zip(*rows) if rows else [()] * len(RAW_COLUMNS)
         
-        # Add timestamp column
-        df['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Build each column with its final dtype so pandas neither infers
+        # dtypes nor converts them afterwards; the index is already 0..n-1
+        titles, prices, ratings, colors, sizes, genders = columns
+        df = pd.DataFrame({
+            'title': pd.array(titles, dtype=_TEXT_DTYPE),
+            'price': np.array(prices, dtype=np.float64),
+            'rating': np.array(ratings, dtype=np.float64),
+            # A color count easily fits in int16
+            'colors': np.array(colors, dtype=np.int16),
+            # Size and gender only take a handful of values
+            'size': pd.Categorical(sizes),
+            'gender': pd.Categorical(genders),
+        }, copy=False)
         
-        # Reset index
-        df = df.reset_index(drop=True)
+        # Add timestamp column: one datetime64[s] value broadcast to every row
+        if timestamp is None:
+            timestamp = datetime.now()
+        df['timestamp'] = np.datetime64(timestamp, 's')
         
-        logger.info(f"Final transformed data: {len(df)} rows")
+        logger.info("Final transformed data: %d rows", len(df))
         return df
         
     except Exception as e:
-        logger.error(f"Error transforming data: {e}")
+        logger.error("Error transforming data: %s", e)
         raise
 
 